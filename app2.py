@@ -1,13 +1,21 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import orjson
 import time
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import pytz
 import os
 import base64
+import io
 import re
+import math
+import http.cookiejar
 
 # =============================
 # Warehouses
@@ -29,6 +37,7 @@ except Exception:
 st.set_page_config(page_title="Wialon Logistics Uploader", layout="wide")
 
 
+@st.cache_data
 def get_base64_image(image_path):
     with open(image_path, "rb") as img_file:
         return base64.b64encode(img_file.read()).decode()
@@ -80,44 +89,51 @@ st.markdown("<br>", unsafe_allow_html=True)
 # Normalization & parsing
 # =============================
 
-def normalize_plate(s: str) -> str:
-    if not isinstance(s, str):
-        return ""
-    return re.sub(r"[^A-Z0-9]", "", s.upper())
+_PLATE_STRIP_RE = re.compile(r"[^A-Z0-9]")
+_TRUCK_PATS = (
+    re.compile(r"Truck\s*(?:Number|No\.?|#)?\s*[:\-]?\s*([A-Z0-9\- ]{4,})", re.IGNORECASE),
+    re.compile(r"\b([A-Z]{2,3}\s*\d{3,4}\s*[A-Z])\b", re.IGNORECASE),
+)
+_WS_RE = re.compile(r"\s+")
+_LATLON_RE = re.compile(r"LAT:\s*(.+?)\s*LONG:\s*(.+)", re.DOTALL)
 
 
-def extract_truck_number_from_text(text: str) -> str | None:
-    if not isinstance(text, str):
-        return None
-    patterns = [
-        r"Truck\s*(?:Number|No\.?|#)?\s*[:\-]?\s*([A-Z0-9\- ]{4,})",
-        r"\b([A-Z]{2,3}\s*\d{3,4}\s*[A-Z])\b",
-    ]
-    for pat in patterns:
-        m = re.search(pat, text, re.IGNORECASE)
-        if m:
-            return normalize_plate(m.group(1))
-    return None
+def _normalize_plates(s: pd.Series) -> pd.Series:
+    return s.astype("string").str.upper().str.replace(_PLATE_STRIP_RE, "", regex=True)
 
 # =============================
 # Excel readers
 # =============================
 
-def extract_coordinates(coord_str):
-    try:
-        if isinstance(coord_str, str) and ("LAT:" in coord_str and "LONG:" in coord_str):
-            parts = coord_str.split("LONG:")
-            latitude = float(parts[0].replace("LAT:", "").strip().replace(" ", ""))
-            longitude = float(parts[1].strip().replace(" ", ""))
-            return latitude, longitude
-    except Exception:
-        pass
-    return None, None
-
+def _dedupe_columns(cols):
+    # Same suffixing as read_excel(header=...): AMOUNT, AMOUNT.1, AMOUNT.2, ...
+    counts = {}
+    out = []
+    for col in cols:
+        cur_count = counts.get(col, 0)
+        name = col
+        while cur_count > 0:
+            counts[name] = cur_count + 1
+            name = f"{col}.{cur_count}"
+            cur_count = counts.get(name, 0)
+        counts[name] = cur_count + 1
+        out.append(name)
+    return out
+
+
+def _convert_numeric_columns(df):
+    # Like read_excel(header=...): an object column becomes numeric only when
+    # every non-null cell converts, so text '1003' and number 1003 agree
+    for col in df.columns:
+        if pd.api.types.is_string_dtype(df[col].dtype):
+            converted = pd.to_numeric(df[col], errors="coerce")
+            if converted.notna().sum() == df[col].notna().sum():
+                df[col] = converted
+    return df
 
 
 def read_asset_id_from_excel(excel_file, truck_number_norm):
-    df = pd.read_excel(excel_file)
+    df = pd.read_excel(excel_file, engine="calamine")
     df.columns = [col.strip().lower() for col in df.columns]
     name_col = None
     for candidate in ("reportname", "name", "unit", "unitname"):
@@ -126,52 +142,110 @@ def read_asset_id_from_excel(excel_file, truck_number_norm):
             break
     if name_col is None or "itemid" not in df.columns:
         raise ValueError("Assets Excel must contain columns like 'ReportName' (or 'Name') and 'itemId'.")
-    df["normalized_name"] = df[name_col].astype(str).apply(normalize_plate)
+    df["normalized_name"] = _normalize_plates(df[name_col]).fillna("")
     if not truck_number_norm:
         return None, None
-    match = df[df["normalized_name"] == truck_number_norm]
+    match = df[df["normalized_name"].to_numpy() == truck_number_norm]
     if match.empty:
-        match = df[df["normalized_name"].str.contains(re.escape(truck_number_norm), na=False)]
+        match = df[df["normalized_name"].str.contains(truck_number_norm, na=False, regex=False)]
     if not match.empty:
         row = match.iloc[0]
         return int(row["itemid"]), str(row[name_col])
     return None, None
 
+# =============================
+# Geo helpers
+# =============================
+
+def _haversine_km(y1, x1, y2, x2):
+    y1, x1, y2, x2 = map(math.radians, (y1, x1, y2, x2))
+    dlat, dlon = y2 - y1, x2 - x1
+    a = math.sin(dlat / 2) ** 2 + math.cos(y1) * math.cos(y2) * math.sin(dlon / 2) ** 2
+    return 2 * 6371 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+# =============================
+# HTTP: pooled session + OSRM leg cache
+# =============================
+
+@st.cache_resource
+def _http_session():
+    # One pooled keep-alive session for all Wialon + OSRM calls, kept across reruns
+    sess = requests.Session()
+    # Shared by every user/thread: never keep cookies in the jar
+    sess.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                          max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[429]))
+    sess.mount("https://", adapter)
+    return sess
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _osrm_polyline(k):
+    # k = (y1, x1, y2, x2) rounded to 5 dp (~1 m); anything but an OSRM "Ok"
+    # answer raises, so only real results are cached
+    osrm_url = (
+        f"https://router.project-osrm.org/route/v1/driving/"
+        f"{k[1]},{k[0]};{k[3]},{k[2]}?overview=full&geometries=polyline"
+    )
+    osrm_response = _http_session().get(osrm_url, timeout=15)
+    osrm_response.raise_for_status()
+    osrm_json = osrm_response.json()
+    if not isinstance(osrm_json, dict) or osrm_json.get('code') != 'Ok':
+        raise ValueError(f"OSRM error: {osrm_json}")
+    if osrm_json.get('routes'):
+        return osrm_json['routes'][0].get('geometry')
+    return None
+
 # =============================
 # Wialon API (Modified to support warehouse selection)
 # =============================
 
 def read_excel_to_df(excel_file):
-    raw_df = pd.read_excel(excel_file, header=None)
+    raw_df = pd.read_excel(excel_file, engine="calamine", header=None)
     truck_number_norm = None
     if 0 in raw_df.columns:
-        for row in raw_df[0].astype(str).tolist():
-            truck_number_norm = extract_truck_number_from_text(row)
-            if truck_number_norm:
-                break
+        col0 = raw_df[0].astype("string")
+        # Per row, the first pattern wins over the second; first row with a
+        # non-empty normalized plate wins
+        hits = col0.str.extract(_TRUCK_PATS[0], expand=False)
+        hits = hits.fillna(col0.str.extract(_TRUCK_PATS[1], expand=False)).dropna()
+        plates = _normalize_plates(hits)
+        plates = plates[plates != ""]
+        if not plates.empty:
+            truck_number_norm = plates.iloc[0]
 
     # Force header row to row 8 (Excel row 8 = index 7)
     header_row_idx = 7
 
-    df = pd.read_excel(excel_file, header=header_row_idx)
-    df.columns = [
-        re.sub(r"\s+", " ", str(col)).replace("\u00A0", " ").strip().upper()
-        for col in df.columns
+    # Slice the already-parsed sheet instead of reading the workbook again
+    header_vals = [
+        f"Unnamed: {i}" if pd.isna(col) else col
+        for i, col in enumerate(raw_df.iloc[header_row_idx].tolist())
     ]
-    df = df.loc[:, ~df.columns.str.startswith("UNNAMED")]
+    df = raw_df.iloc[header_row_idx + 1:].reset_index(drop=True).infer_objects()
+    df.columns = _dedupe_columns([
+        _WS_RE.sub(" ", str(col)).replace("\u00A0", " ").strip().upper()
+        for col in header_vals
+    ])
+    df = _convert_numeric_columns(df[[c for c in df.columns if not c.startswith("UNNAMED")]].copy())
 
     required_cols = {"CUSTOMER ID", "CUSTOMER NAME", "LOCATION", "COORDINATES"}
     missing = required_cols - set(df.columns)
     if missing:
         raise ValueError(f"Missing required columns in orders Excel: {missing}")
 
-    df = df[df["CUSTOMER ID"].notna()]
-    df = df[~df["CUSTOMER NAME"].astype(str).str.contains("TOTAL", case=False, na=False)]
+    # CUSTOMER ID keeps its read dtype so cross-file de-duplication still matches
+    df = df.astype({"CUSTOMER NAME": "string", "LOCATION": "string"})
+
+    mask = df["CUSTOMER ID"].notna() & ~df["CUSTOMER NAME"].str.contains("TOTAL", case=False, na=False)
+    df = df.loc[mask].copy()
 
     for col in ("TONNAGE", "AMOUNT"):
-        if col in df.columns:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].fillna(0)
+        elif col in df.columns:
             df[col] = pd.to_numeric(
-                df[col].astype(str).str.replace(",", "").str.strip(), errors="coerce"
+                df[col].astype(str).str.replace(",", "", regex=False).str.strip(), errors="coerce"
             ).fillna(0)
         else:
             df[col] = 0
@@ -185,12 +259,25 @@ def read_excel_to_df(excel_file):
         "INVOICE NO.": lambda x: ", ".join(str(i) for i in x if pd.notna(i)) if "INVOICE NO." in df.columns else "",
     })
 
-    df_grouped[["LAT", "LONG"]] = df_grouped["COORDINATES"].apply(
-        lambda x: pd.Series(extract_coordinates(x))
-    )
+    # Loose capture, then let to_numeric decide what is a number (as float() did)
+    latlon = df_grouped["COORDINATES"].astype(str).str.extract(_LATLON_RE)
+    for col, part in (("LAT", 0), ("LONG", 1)):
+        df_grouped[col] = pd.to_numeric(
+            latlon[part].str.replace(" ", "", regex=False).str.strip(), errors="coerce"
+        )
     df_grouped = df_grouped.dropna(subset=["LAT", "LONG"])
     return df_grouped, truck_number_norm
 
+
+@st.cache_data(show_spinner=False)
+def _parse_orders(content: bytes):
+    return read_excel_to_df(io.BytesIO(content))
+
+
+@st.cache_data(show_spinner=False)
+def _parse_assets(content: bytes, truck_number_norm):
+    return read_asset_id_from_excel(io.BytesIO(content), truck_number_norm)
+
 # PATCH: enforce nearest-first sequence regardless of Wialon optimizer
 # Paste this function over your existing `send_orders_and_create_route`.
 
@@ -198,6 +285,8 @@ def send_orders_and_create_route(token, resource_id, unit_id, vehicle_name, df_g
     try:
         base_url = "https://hst-api.wialon.com/wialon/ajax.html"
 
+        sess = _http_session()
+
         # ---- Login ----
         st.info("Logging in with token...")
         login_payload = {
@@ -205,7 +294,7 @@ def send_orders_and_create_route(token, resource_id, unit_id, vehicle_name, df_g
             "params": json.dumps({"token": str(token).strip()}),
         }
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        login_response = requests.post(base_url, data=login_payload, headers=headers, timeout=30)
+        login_response = sess.post(base_url, data=login_payload, headers=headers, timeout=30)
         login_result = login_response.json()
 
         if not isinstance(login_result, dict) or "eid" not in login_result:
@@ -217,41 +306,41 @@ def send_orders_and_create_route(token, resource_id, unit_id, vehicle_name, df_g
         wh_lat, wh_lon = wh["lat"], wh["lon"]
         wh_name = warehouse_choice
 
-        # ---- Distance helper ----
-        def calculate_distance(lat1, lon1, lat2, lon2):
-            from math import sin, cos, sqrt, atan2, radians
-            R = 6371
-            lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-            c = 2 * atan2(sqrt(a), sqrt(1 - a))
-            return R * c
-
-        # Compute distance from warehouse and sort NEAREST first for sequence
-        df_grouped['Distance_From_Warehouse'] = df_grouped.apply(
-            lambda row: calculate_distance(wh_lat, wh_lon, row['LAT'], row['LONG']), axis=1
-        )
+        # Compute distance from warehouse (haversine, km) and sort NEAREST first for sequence
+        lat1, lon1 = math.radians(wh_lat), math.radians(wh_lon)
+        lat2 = np.radians(df_grouped['LAT'].to_numpy(dtype=float))
+        lon2 = np.radians(df_grouped['LONG'].to_numpy(dtype=float))
+        dlat = lat2 - lat1
+        dlon = lon2 - lon1
+        a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+        df_grouped['Distance_From_Warehouse'] = 6371 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
         df_grouped = df_grouped.sort_values('Distance_From_Warehouse', ascending=True).reset_index(drop=True)
 
         # ---- Build orders for optimization (we will NOT use the returned sequence) ----
         orders = []
         wh_coords = f"{wh_lat}, {wh_lon}"
 
-        for idx, row in df_grouped.iterrows():
+        lats = df_grouped['LAT'].to_numpy()
+        lons = df_grouped['LONG'].to_numpy()
+        names = df_grouped['CUSTOMER NAME'].to_numpy()
+        locs = df_grouped['LOCATION'].to_numpy()
+        tons = df_grouped['TONNAGE'].to_numpy()
+
+        for idx in range(len(df_grouped)):
             try:
-                weight_kg = int(float(row.get('TONNAGE', 0)) * 1000)
+                weight_kg = int(float(tons[idx]) * 1000)
             except Exception:
                 weight_kg = 0
-            coords = f"{row['LAT']}, {row['LONG']}"
-            location = f"{row['LOCATION']} ({coords})"
+            y, x = float(lats[idx]), float(lons[idx])
+            coords = f"{y}, {x}"
+            location = f"{locs[idx]} ({coords})"
             order_id = idx + 1  # we will use our own sequence later
             orders.append({
-                "y": float(row['LAT']),
-                "x": float(row['LONG']),
+                "y": y,
+                "x": x,
                 "tf": tf,
                 "tt": tt,
-                "n": row['CUSTOMER NAME'],
+                "n": names[idx],
                 "f": 0,
                 "r": 20,
                 "id": order_id,
@@ -269,7 +358,7 @@ def send_orders_and_create_route(token, resource_id, unit_id, vehicle_name, df_g
 
         optimize_payload = {
             "svc": "order/optimize",
-            "params": json.dumps({
+            "params": orjson.dumps({
                 "itemId": int(resource_id),
                 "orders": orders,
                 "warehouses": [
@@ -295,12 +384,12 @@ def send_orders_and_create_route(token, resource_id, unit_id, vehicle_name, df_g
                 "pt": {"n": wh_name, "y": wh_lat, "x": wh_lon, "a": f"{wh_name} ({wh_coords})"},
                 "tf": tf,
                 "tt": tt,
-            }),
+            }).decode(),
             "sid": session_id,
         }
 
         st.info("Optimizing route (for stats only)...")
-        optimize_response = requests.post(base_url, data=optimize_payload, timeout=60)
+        optimize_response = sess.post(base_url, data=optimize_payload, timeout=60)
         optimize_result = optimize_response.json()
 
         # We'll keep route summary/polylines if available, but ignore the optimizer's order
@@ -321,6 +410,26 @@ def send_orders_and_create_route(token, resource_id, unit_id, vehicle_name, df_g
         except Exception:
             pass
 
+        # ---- OSRM polylines for every leg (fetched concurrently) ----
+        def fetch_osrm_leg(leg):
+            (y1, x1), (y2, x2) = leg
+            try:
+                return _osrm_polyline((round(y1, 5), round(x1, 5), round(y2, 5), round(x2, 5)))
+            except Exception:
+                return None
+
+        stops = [(wh_lat, wh_lon)] + [(float(y), float(x)) for y, x in zip(lats, lons)] + [(wh_lat, wh_lon)]
+        legs = list(zip(stops[:-1], stops[1:]))
+        if end_warehouse_rp:
+            legs = legs[:-1]  # optimizer already gave us the final leg
+        # Keep concurrency low: the public OSRM demo server allows ~1 request/second
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            leg_polylines = list(pool.map(fetch_osrm_leg, legs))
+        missing_legs = [i + 1 for i, rp in enumerate(leg_polylines) if not rp]
+        if missing_legs:
+            st.warning(f"No OSRM polyline for leg(s): {', '.join(map(str, missing_legs))}; "
+                       f"those legs are sent without a route line.")
+
         # ---- Route build (NEAREST-FIRST SEQUENCE) ----
         route_orders = []
         current_time = int(time.time())
@@ -360,43 +469,28 @@ def send_orders_and_create_route(token, resource_id, unit_id, vehicle_name, df_g
         })
 
         prev_coords = {'y': wh_lat, 'x': wh_lon}
-
-        def calc_dist(a, b):
-            from math import sin, cos, sqrt, atan2, radians
-            R = 6371
-            y1, x1, y2, x2 = map(radians, [a['y'], a['x'], b['y'], b['x']])
-            dlat, dlon = y2 - y1, x2 - x1
-            aa = sin(dlat/2)**2 + cos(y1)*cos(y2)*sin(dlon/2)**2
-            return 2 * R * atan2(sqrt(aa), (1-aa)**0.5)
+        total_mileage, total_cost, total_weight = 0, 0.0, 0
 
         # Build the sequence strictly by nearest-first order we computed above
-        for idx, cust_row in df_grouped.iterrows():
+        # Reuse the column arrays from above; positional access, no per-row Series
+        amounts = df_grouped['AMOUNT'].to_numpy()
+        for idx in range(len(df_grouped)):
             order_id = idx + 1
-            order_name = cust_row['CUSTOMER NAME']
-            coords = {'y': float(cust_row['LAT']), 'x': float(cust_row['LONG'])}
+            order_name = names[idx]
+            y, x = stops[idx + 1]  # stops[0] is the start warehouse
+            coords = {'y': y, 'x': x}
 
-            weight_kg = int(float(cust_row.get('TONNAGE', 0)) * 1000)
-            cost_val = float(cust_row.get('AMOUNT', 0.0))
-            location = f"{cust_row['LOCATION']} ({coords['y']}, {coords['x']})"
+            weight_kg = int(float(tons[idx]) * 1000)
+            cost_val = float(amounts[idx])
+            location = f"{locs[idx]} ({coords['y']}, {coords['x']})"
 
             # simple time plan: +10 minutes per stop from last
             order_tm = max(last_visit_time + 3600, int(tf))
 
-            mileage = int(calc_dist(prev_coords, coords) * 1000)
+            mileage = int(_haversine_km(prev_coords['y'], prev_coords['x'], coords['y'], coords['x']) * 1000)
 
             # OSRM polyline for leg
-            order_rp = None
-            try:
-                osrm_url = (
-                    f"https://router.project-osrm.org/route/v1/driving/"
-                    f"{prev_coords['x']},{prev_coords['y']};{coords['x']},{coords['y']}?overview=full&geometries=polyline"
-                )
-                osrm_json = requests.get(osrm_url, timeout=15).json()
-                if isinstance(osrm_json, dict) and osrm_json.get('routes'):
-                    order_rp = osrm_json['routes'][0].get('geometry')
-                    #st.info(f"Using OSRM polyline for leg to order {order_id} (nearest-first).")
-            except Exception:
-                pass
+            order_rp = leg_polylines[idx]
 
             sequence_index += 1
             route_orders.append({
@@ -438,33 +532,21 @@ def send_orders_and_create_route(token, resource_id, unit_id, vehicle_name, df_g
                 "cargo": {"weight": str(weight_kg), "cost": str(int(cost_val))},
             })
 
+            total_mileage += mileage
+            total_cost += int(cost_val)
+            total_weight += weight_kg
+
             prev_coords = coords
             last_visit_time = order_tm
 
         # Close at warehouse (f:264)
-        def calc_dist_pts(a, b):
-            from math import sin, cos, sqrt, atan2, radians
-            R = 6371
-            y1, x1, y2, x2 = map(radians, [a['y'], a['x'], b['y'], b['x']])
-            dlat, dlon = y2 - y1, x2 - x1
-            aa = sin(dlat/2)**2 + cos(y1)*cos(y2)*sin(dlon/2)**2
-            return 2 * R * atan2(sqrt(aa), (1-aa)**0.5)
-        mileage_back = int(calc_dist_pts(prev_coords, {'y': wh_lat, 'x': wh_lon}) * 1000)
+        mileage_back = int(_haversine_km(prev_coords['y'], prev_coords['x'], wh_lat, wh_lon) * 1000)
+        total_mileage += mileage_back
         final_id = max([o.get("id", 0) for o in route_orders]) + 1
         sequence_index += 1
 
         if not end_warehouse_rp:
-            try:
-                osrm_url = (
-                    f"https://router.project-osrm.org/route/v1/driving/"
-                    f"{prev_coords['x']},{prev_coords['y']};{wh_lon},{wh_lat}?overview=full&geometries=polyline"
-                )
-                osrm_json = requests.get(osrm_url, timeout=15).json()
-                if isinstance(osrm_json, dict) and osrm_json.get('routes'):
-                    end_warehouse_rp = osrm_json['routes'][0].get('geometry')
-                    #st.info("Using OSRM polyline for final leg to warehouse.")
-            except Exception:
-                pass
+            end_warehouse_rp = leg_polylines[-1]
 
         route_orders.append({
             "uid": int(unit_id),
@@ -498,13 +580,9 @@ def send_orders_and_create_route(token, resource_id, unit_id, vehicle_name, df_g
             "cargo": {"weight": "0", "cost": "0"},
         })
 
-        total_mileage = sum(order['p']['r']['m'] for order in route_orders)
-        total_cost = sum(float(order['p']['c']) for order in route_orders if order['f'] == 0)
-        total_weight = sum(int(order['p']['w']) for order in route_orders if order['f'] == 0)
-
         batch_payload = {
             "svc": "core/batch",
-            "params": json.dumps({
+            "params": orjson.dumps({
                 "params": [{
                     "svc": "order/route_update",
                     "params": {
@@ -527,12 +605,12 @@ def send_orders_and_create_route(token, resource_id, unit_id, vehicle_name, df_g
                     },
                 }],
                 "flags": 0,
-            }),
+            }).decode(),
             "sid": session_id,
         }
 
         st.info("Creating final route (nearest-first)...")
-        route_response = requests.post(base_url, data=batch_payload, timeout=60)
+        route_response = sess.post(base_url, data=batch_payload, timeout=60)
         route_result = route_response.json()
 
         if isinstance(route_result, list):
@@ -558,11 +636,11 @@ def send_orders_and_create_route(token, resource_id, unit_id, vehicle_name, df_g
         return {"error": 1, "message": f"An unexpected error occurred: {str(e)}"}
 
 
-def process_multiple_excels(excel_files):
+def process_multiple_excels(excel_contents):
     all_gdfs = []
     truck_numbers = set()
-    for excel_file in excel_files:
-        gdf_joined, truck_number = read_excel_to_df(excel_file)
+    for content in excel_contents:
+        gdf_joined, truck_number = _parse_orders(content)
         if gdf_joined is not None and len(gdf_joined):
             all_gdfs.append(gdf_joined)
         if truck_number:
@@ -604,11 +682,11 @@ def run_wialon_uploader():
                 start_time = tz.localize(datetime.combine(selected_date, datetime.min.time().replace(hour=start_hour)))
                 end_time = tz.localize(datetime.combine(selected_date, datetime.min.time().replace(hour=end_hour)))
                 tf, tt = int(start_time.timestamp()), int(end_time.timestamp())
-                gdf_joined, truck_number_norm = process_multiple_excels(excel_files)
+                gdf_joined, truck_number_norm = process_multiple_excels([f.getvalue() for f in excel_files])
                 if gdf_joined is None or gdf_joined.empty:
                     st.error("No delivery rows with valid coordinates were found.")
                     return
-                unit_id, vehicle_name = read_asset_id_from_excel(assets_file, truck_number_norm)
+                unit_id, vehicle_name = _parse_assets(assets_file.getvalue(), truck_number_norm)
                 if not unit_id:
                     st.error(f"Could not find unit ID for truck (normalized): {truck_number_norm or 'UNKNOWN'}.")
                     return
@@ -0,0 +1,48 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("python_calamine")
+openpyxl = pytest.importorskip("openpyxl")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app2  # noqa: E402
+
+HEADER = ["NO.", "CUSTOMER ID", "CUSTOMER NAME", "LOCATION", "COORDINATES", "REP", "TONNAGE", "AMOUNT", "INVOICE NO."]
+
+
+def _orders_workbook(rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Truck Number: KBX 123A"])
+    for _ in range(6):
+        ws.append([None])
+    ws.append(HEADER)  # Excel row 8 = header
+    for row in rows:
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_text_and_numeric_customer_ids_merge_across_files():
+    coords = "LAT: -0.30 LONG: 36.05"
+    first = _orders_workbook([
+        [1, "1003", "Gamma", "Nakuru", coords, "Rep A", 1.5, 100, "INV-1"],
+        [2, 1003, "Gamma", "Nakuru", coords, "Rep A", 0.5, 300, "INV-2"],
+    ])
+    second = _orders_workbook([
+        [1, 1003, "Gamma", "Nakuru", coords, "Rep A", 1.0, 50, "INV-3"],
+    ])
+
+    df, truck = app2.process_multiple_excels([first, second])
+
+    assert truck == "KBX123A"
+    assert len(df) == 1
+    row = df.iloc[0]
+    assert row["CUSTOMER NAME"] == "Gamma"
+    assert row["TONNAGE"] == pytest.approx(2.0)
+    assert row["AMOUNT"] == pytest.approx(400)